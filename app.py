@@ -4,7 +4,9 @@ import os
 import time
 import queue
 import threading
+import wave
 import eventlet
+import numpy as np
 import torch
 
 from modules.vad_utils import filter_speech
@@ -16,11 +18,14 @@ from flask_socketio import SocketIO
 from config import (
     AWS_ACCESS_KEY, AWS_SECRET_KEY, AWS_REGION,
     FLASK_SECRET_KEY, WHISPER_MODEL, SOURCE_LANGUAGE,
-    SUPPORTED_LANGUAGES, RECORDINGS_DIR, CACHE_DIR
+    SUPPORTED_LANGUAGES, RECORDINGS_DIR, CACHE_DIR, LOAD_TEST_MODE,
+    MESSAGE_QUEUE, HISTORY_MAX_SEGMENTS
 )
 from modules.audio_capture import AudioCapture
 from modules.transcription import WhisperTranscriber
 from modules.translation import AWSTranslator
+from modules.autotune import load_profile
+from modules.history import TranscriptHistory, register_history_api
 
 if torch.cuda.is_available():
     # Optimisations pour les GPU NVIDIA série 16xx
@@ -28,42 +33,59 @@ if torch.cuda.is_available():
     torch.cuda.empty_cache()
 app = Flask(__name__)
 app.config['SECRET_KEY'] = FLASK_SECRET_KEY
-socketio = SocketIO(app, async_mode='eventlet', cors_allowed_origins="*")
+# Avec MESSAGE_QUEUE, les diffusions passent par le broker et sont relayées par les nœuds edge.py
+socketio = SocketIO(app, async_mode='eventlet', cors_allowed_origins="*",
+                    message_queue=MESSAGE_QUEUE)
 
 # Files d’attente pour découplage
 audio_q = queue.Queue(maxsize=10)
 text_q  = queue.Queue(maxsize=10)
 
+# Profil matériel (python -m modules.autotune), sinon valeurs par défaut
+autotune_profile = load_profile() or {}
+if autotune_profile:
+    print(f"[Autotune] Profil chargé: {autotune_profile['model']}/{autotune_profile['compute_type']}/"
+          f"{autotune_profile['cpu_threads']} threads (RTF={autotune_profile['rtf']:.2f}×)")
+    torch.set_num_threads(autotune_profile['torch_threads'])
+
 # Modules
-transcriber = WhisperTranscriber(model_name=WHISPER_MODEL,
-                                 device=None,
-                                 language=SOURCE_LANGUAGE)
+transcriber = WhisperTranscriber(model_name=autotune_profile.get('model', WHISPER_MODEL),
+                                 device=autotune_profile.get('device'),
+                                 language=SOURCE_LANGUAGE,
+                                 compute_type=autotune_profile.get('compute_type'),
+                                 cpu_threads=autotune_profile.get('cpu_threads', 6),
+                                 num_workers=autotune_profile.get('num_workers', 1),
+                                 memory_fraction=autotune_profile.get('memory_fraction', 0.6))
 translator  = AWSTranslator(AWS_ACCESS_KEY,
                             AWS_SECRET_KEY,
                             AWS_REGION,
                             supported_languages=list(SUPPORTED_LANGUAGES.keys()))
 
 current_transcription = ""
-translations = {}
+history = TranscriptHistory(max_segments=HISTORY_MAX_SEGMENTS)
+register_history_api(app, socketio, history, SOURCE_LANGUAGE)
 is_recording = False
 recorder = None
 
 def audio_callback(audio_np, sample_rate, filename=None):
     """Empile le segment brut, ne fait rien d’autre."""
-    audio_q.put((audio_np, sample_rate))
+    # L'epoch accompagne le segment : après /reset, ce qui reste en file est écarté
+    audio_q.put((history.epoch, audio_np, sample_rate))
 
 def whisper_worker():
     global current_transcription
     while True:
         try:
-            raw_audio, sr = audio_q.get(timeout=1)
+            epoch, raw_audio, sr = audio_q.get(timeout=1)
+            if epoch != history.epoch:
+                continue
             audio_np = filter_speech(raw_audio, sr)
             if audio_np.size == 0:
                 continue
             text = transcriber.transcribe_audio(audio_np, sr)
             if text.strip():
                 current_transcription = transcriber.get_full_transcript()
-                text_q.put(text)
+                text_q.put((epoch, text))
                 emit_updates()
                 time.sleep(0.1)
         except queue.Empty:
@@ -74,15 +96,23 @@ def whisper_worker():
 
 
 def translate_worker():
-    global translations
     while True:
-        text = text_q.get()
+        epoch, text = text_q.get()
+        if epoch != history.epoch:
+            # Texte d'une session réinitialisée : inutile de le traduire
+            continue
         translations = translator.translate_to_all(text, source_lang=SOURCE_LANGUAGE)
-        emit_updates()
+        # append refuse le segment si une réinitialisation a eu lieu pendant la traduction
+        segment = history.append(translations, epoch=epoch)
+        if segment:
+            # Les spectateurs reçoivent les traductions par new_segment et rattrapent via 'resume'
+            socketio.emit('new_segment', segment)
+
+def reset_history():
+    socketio.emit('history_reset', {'epoch': history.reset()})
 
 def emit_updates():
     socketio.emit('update_transcription', {'text': current_transcription})
-    socketio.emit('update_translations', translations)
 
 def memory_cleanup():
     while True:
@@ -117,7 +147,7 @@ def client():
 
 @app.route('/start_recording', methods=['POST'])
 def start_recording():
-    global recorder, is_recording, current_transcription, translations
+    global recorder, is_recording, current_transcription
 
     # Empêcher les démarrages multiples
     if is_recording:
@@ -129,7 +159,8 @@ def start_recording():
     socketio.emit('recording_status', {'status': True})
 
     # Réinitialiser les transcriptions
-    current_transcription, translations = "", {}
+    current_transcription = ""
+    reset_history()
     emit_updates()
 
     # Maintenant démarrer l'enregistrement en arrière-plan
@@ -165,19 +196,73 @@ def stop_recording():
 
 @app.route('/reset', methods=['POST'])
 def reset():
-    global current_transcription, translations
+    global current_transcription
     current_transcription = ""
     transcriber.reset_transcript()
-    translations = {}
+    reset_history()
     emit_updates()
     return jsonify(status="reset_done")
 
+if LOAD_TEST_MODE:
+    @app.route('/load_test/inject', methods=['POST'])
+    def load_test_inject():
+        """Alimente le pipeline sans micro : texte synthétique ou fichier WAV enregistré."""
+        global current_transcription
+        data = request.get_json(force=True) or {}
+
+        if data.get('wav'):
+            # Seuls les enregistrements de RECORDINGS_DIR sont rejouables
+            recordings = os.path.realpath(RECORDINGS_DIR)
+            path = os.path.realpath(os.path.join(recordings, data['wav']))
+            if os.path.commonpath([recordings, path]) != recordings or not os.path.isfile(path):
+                return jsonify(status="wav_not_found"), 400
+            try:
+                with wave.open(path, 'rb') as wf:
+                    params = wf.getparams()
+            except (wave.Error, EOFError) as e:
+                return jsonify(status="wav_invalid", error=str(e)), 400
+            # Whisper ignore sample_rate : le format doit être celui d'AudioCapture
+            if (params.nchannels, params.framerate, params.sampwidth) != (1, 16000, 2):
+                return jsonify(status="wav_invalid",
+                               error="WAV mono 16 kHz int16 requis"), 400
+
+            def feed_wav(path, segment_seconds=2.0):
+                with wave.open(path, 'rb') as wf:
+                    sr = wf.getframerate()
+                    frames_per_segment = int(sr * segment_seconds)
+                    while True:
+                        frames = wf.readframes(frames_per_segment)
+                        if not frames:
+                            break
+                        audio_callback(np.frombuffer(frames, dtype=np.int16), sr)
+                        # Cadence temps réel, comme AudioCapture
+                        eventlet.sleep(segment_seconds)
+
+            socketio.start_background_task(feed_wav, path)
+            return jsonify(status="wav_queued", duration=params.nframes / params.framerate)
+
+        text = data.get('text', '').strip()
+        if not text:
+            return jsonify(status="empty_text"), 400
+        current_transcription = (current_transcription + " " + text).strip()
+        if data.get('translate'):
+            text_q.put((history.epoch, text))
+        else:
+            # Segment non traduit : exerce la diffusion new_segment sans appel AWS
+            socketio.emit('new_segment', history.append({SOURCE_LANGUAGE: text}))
+        emit_updates()
+        return jsonify(status="text_injected", segment_seq=history.last_seq)
+
+    @app.route('/load_test/stats')
+    def load_test_stats():
+        return jsonify(pid=os.getpid(), segment_seq=history.last_seq)
+
 @socketio.on('connect')
 def handle_connect():
+    # Le client est local à ce nœud : inutile de passer par le broker
     sid = request.sid
-    socketio.emit('update_transcription', {'text': current_transcription}, to=sid)
-    socketio.emit('update_translations', translations,    to=sid)
-    socketio.emit('recording_status', {'status': is_recording}, to=sid)
+    socketio.emit('update_transcription', {'text': current_transcription}, to=sid, ignore_queue=True)
+    socketio.emit('recording_status', {'status': is_recording}, to=sid, ignore_queue=True)
 
 def start_background_task():
     def heartbeat():
@@ -19,4 +19,21 @@ SUPPORTED_LANGUAGES = {
 }
 
 RECORDINGS_DIR    = os.getenv('RECORDINGS_DIR', 'recordings')
-CACHE_DIR         = os.getenv('CACHE_DIR', 'cache')
\ No newline at end of file
+CACHE_DIR         = os.getenv('CACHE_DIR', 'cache')
+
+# Mode test de charge : expose /load_test/* pour injecter du texte ou de l'audio enregistré
+LOAD_TEST_MODE    = os.getenv('LOAD_TEST_MODE', '0') == '1'
+
+# Relais multi-nœuds : URL du broker (ex. redis://localhost:6379/0, amqp://...).
+# Vide = instance unique. Les nœuds edge.py s'y abonnent pour servir /client.
+MESSAGE_QUEUE     = os.getenv('MESSAGE_QUEUE') or None
+EDGE_PORT         = int(os.getenv('EDGE_PORT', '5001'))
+# URL HTTP du nœud d'inférence, d'où un nœud edge amorce son historique au démarrage
+INFERENCE_URL     = os.getenv('INFERENCE_URL', 'http://localhost:5000')
+
+# Profil matériel écrit par `python -m modules.autotune`, chargé au démarrage de app.py
+AUTOTUNE_PROFILE    = os.path.join(CACHE_DIR, 'autotune_profile.json')
+AUTOTUNE_RTF_TARGET = float(os.getenv('AUTOTUNE_RTF_TARGET', '0.5'))
+
+# Historique des segments traduits rejoué aux spectateurs en retard ou reconnectés
+HISTORY_MAX_SEGMENTS = int(os.getenv('HISTORY_MAX_SEGMENTS', '2000'))
@@ -0,0 +1,56 @@
+# edge.py
+# Nœud edge sans état : sert /client en relayant les événements publiés par app.py via MESSAGE_QUEUE.
+import eventlet
+eventlet.monkey_patch()
+
+from flask import Flask, render_template, request
+from flask_socketio import SocketIO
+
+from config import (
+    FLASK_SECRET_KEY, SUPPORTED_LANGUAGES, SOURCE_LANGUAGE,
+    MESSAGE_QUEUE, EDGE_PORT, INFERENCE_URL, HISTORY_MAX_SEGMENTS
+)
+from modules.history import TranscriptHistory, register_history_api
+from modules.relay import RelayState, create_client_manager
+
+history = TranscriptHistory(max_segments=HISTORY_MAX_SEGMENTS, replica=True)
+relay_state = RelayState(history)
+
+app = Flask(__name__)
+app.config['SECRET_KEY'] = FLASK_SECRET_KEY
+socketio = SocketIO(app, async_mode='eventlet', cors_allowed_origins="*",
+                    client_manager=create_client_manager(MESSAGE_QUEUE, relay_state.on_broadcast))
+# Historique répliqué localement : les reprises de spectateurs ne touchent pas le nœud d'inférence
+register_history_api(app, socketio, history, SOURCE_LANGUAGE)
+
+
+def seed_history():
+    # Abonné au broker avant l'amorçage : seed() fusionne avec les segments déjà relayés
+    delay = 1
+    while True:
+        try:
+            history.seed_from(INFERENCE_URL)
+            return
+        except Exception as e:
+            print(f"[Historique] Amorçage depuis {INFERENCE_URL} impossible ({e}), nouvel essai dans {delay}s")
+            eventlet.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+@app.route('/client')
+def client():
+    return render_template('client.html',
+                           languages=SUPPORTED_LANGUAGES)
+
+@socketio.on('connect')
+def handle_connect():
+    # État rejoué depuis le cache local : aucune charge sur le nœud d'inférence
+    sid = request.sid
+    transcription, recording_status = relay_state.snapshot()
+    socketio.emit('update_transcription', transcription, to=sid, ignore_queue=True)
+    socketio.emit('recording_status', recording_status, to=sid, ignore_queue=True)
+
+if __name__ == '__main__':
+    print(f"🟢 Nœud edge abonné à {MESSAGE_QUEUE}")
+    socketio.start_background_task(seed_history)
+    socketio.run(app, host='0.0.0.0', port=EDGE_PORT)
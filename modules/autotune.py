@@ -0,0 +1,248 @@
+"""
+Autotune matériel : choisit modèle, compute_type et threads pour la machine courante.
+
+Usage (depuis la racine du projet) :
+    python -m modules.autotune --audio recordings/conference.wav
+    python -m modules.autotune --audio recordings/conference.wav --max-model medium
+
+L'enregistrement doit contenir de la parole réelle (WAV mono 16 kHz int16) : le coût du
+décodeur dépend du nombre de tokens produits, qu'un signal synthétique sous-estime.
+
+Le profil le plus rapide respectant AUTOTUNE_RTF_TARGET est écrit dans AUTOTUNE_PROFILE
+(sous CACHE_DIR) et chargé par app.py au démarrage via load_profile().
+"""
+import argparse
+import gc
+import json
+import os
+import time
+import wave
+
+import numpy as np
+import psutil
+import torch
+from faster_whisper import WhisperModel
+
+from config import AUTOTUNE_PROFILE, AUTOTUNE_RTF_TARGET, WHISPER_MODEL, SOURCE_LANGUAGE
+from modules.transcription import DECODE_OPTIONS, MODEL_TIERS, build_prompt, model_tier
+
+# Empreinte mémoire approximative en int8 (Go) de chaque gamme de MODEL_TIERS
+MODEL_MEMORY_GB = {
+    "tiny": 0.5,
+    "base": 0.7,
+    "small": 1.2,
+    "medium": 2.5,
+    "large": 4.5,
+}
+SEGMENT_SECONDS = 2.0  # Même découpage que AudioCapture dans app.py
+SAMPLE_RATE = 16000
+
+
+def probe_hardware() -> dict:
+    """Cœurs, mémoire vive et GPU disponibles."""
+    hw = {
+        "logical_cores": os.cpu_count() or 1,
+        "physical_cores": psutil.cpu_count(logical=False) or os.cpu_count() or 1,
+        "ram_available_gb": round(psutil.virtual_memory().available / 1e9, 2),
+        "cuda": torch.cuda.is_available(),
+    }
+    if hw["cuda"]:
+        hw["gpu_name"] = torch.cuda.get_device_name(0)
+        hw["vram_gb"] = round(torch.cuda.get_device_properties(0).total_memory / 1e9, 2)
+    return hw
+
+
+def candidate_models(hw: dict, max_model: str) -> list:
+    """Modèles tenant en mémoire : max_model tel quel, puis les gammes plus légères."""
+    tiers = list(MODEL_TIERS)
+    if model_tier(max_model) is None:
+        raise ValueError(f"Modèle Whisper inconnu: {max_model}")
+    names = [max_model] + list(reversed(tiers[:tiers.index(model_tier(max_model))]))
+    budget = hw["vram_gb"] if hw["cuda"] else hw["ram_available_gb"]
+    return [m for m in names if MODEL_MEMORY_GB[model_tier(m)] < budget * 0.9]
+
+
+def candidate_settings(hw: dict) -> list:
+    """Combinaisons (compute_type, cpu_threads) à mesurer."""
+    physical = hw["physical_cores"]
+    if hw["cuda"]:
+        # Sur GPU les threads CPU comptent peu : on en garde pour le VAD et les traductions
+        threads = [max(1, min(4, physical - 1))]
+        compute_types = ["int8_float16", "float16", "int8"]
+    else:
+        # Jamais tous les cœurs physiques : le benchmark tourne sans VAD ni traductions, il
+        # favoriserait sinon la configuration qui affame le VAD Silero en production
+        threads = sorted({max(1, physical - 1), max(1, physical // 2)}, reverse=True)
+        compute_types = ["int8", "float32"]
+    return [(ct, th) for ct in compute_types for th in threads]
+
+
+def load_sample(path: str, max_segments: int = 5) -> list:
+    """Découpe un enregistrement de parole (WAV mono 16 kHz int16) en segments de SEGMENT_SECONDS."""
+    with wave.open(path, "rb") as wf:
+        if (wf.getnchannels(), wf.getframerate(), wf.getsampwidth()) != (1, SAMPLE_RATE, 2):
+            raise ValueError(f"{path}: WAV mono {SAMPLE_RATE} Hz int16 requis "
+                             f"(reçu {wf.getnchannels()} canaux, {wf.getframerate()} Hz)")
+        audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+    size = int(SAMPLE_RATE * SEGMENT_SECONDS)
+    segments = [audio[i:i + size].astype(np.float32) / 32768.0
+                for i in range(0, len(audio) - size + 1, size)][:max_segments]
+    if not segments:
+        raise ValueError(f"{path}: enregistrement plus court que {SEGMENT_SECONDS}s")
+    return segments
+
+
+def benchmark(model_name: str, device: str, compute_type: str, cpu_threads: int,
+              segments: list, runs: int) -> float:
+    """Retourne le RTF médian (temps de décodage / durée audio) pour une configuration."""
+    model = WhisperModel(model_name,
+                         device=device,
+                         compute_type=compute_type,
+                         download_root="models_cache",
+                         cpu_threads=cpu_threads,
+                         num_workers=1)
+
+    def decode_all():
+        # Segments enchaînés avec le prompt contextuel, comme dans WhisperTranscriber
+        transcript = ""
+        for audio in segments:
+            result, _ = model.transcribe(audio, language=SOURCE_LANGUAGE,
+                                         initial_prompt=build_prompt(transcript), **DECODE_OPTIONS)
+            transcript = (transcript + " " + " ".join(seg.text for seg in result)).strip()
+
+    try:
+        duration = len(segments) * SEGMENT_SECONDS
+        # Préchauffage : allocation mémoire et compilation des noyaux
+        decode_all()
+        rtfs = []
+        for _ in range(runs):
+            start = time.time()
+            decode_all()
+            rtfs.append((time.time() - start) / duration)
+        return float(np.median(rtfs))
+    finally:
+        del model
+        gc.collect()
+        if device == "cuda":
+            torch.cuda.empty_cache()
+
+
+def autotune(audio_path: str, rtf_target: float = AUTOTUNE_RTF_TARGET,
+             max_model: str = WHISPER_MODEL, runs: int = 3) -> dict:
+    hw = probe_hardware()
+    device = "cuda" if hw["cuda"] else "cpu"
+    print(f"[Autotune] Matériel: {hw}")
+
+    segments = load_sample(audio_path)
+    settings = candidate_settings(hw)
+    best = None
+
+    for model_name in candidate_models(hw, max_model):
+        results = []
+        for compute_type, cpu_threads in settings:
+            try:
+                rtf = benchmark(model_name, device, compute_type, cpu_threads, segments, runs)
+            except Exception as e:
+                print(f"[Autotune] {model_name}/{compute_type}/{cpu_threads} threads: échec ({e})")
+                continue
+            print(f"[Autotune] {model_name}/{compute_type}/{cpu_threads} threads: RTF={rtf:.2f}×")
+            results.append((rtf, compute_type, cpu_threads))
+
+        if not results:
+            continue
+        rtf, compute_type, cpu_threads = min(results)
+        best = (model_name, rtf, compute_type, cpu_threads)
+        if rtf <= rtf_target:
+            # Modèle le plus précis tenant l'objectif temps réel
+            break
+
+    if best is None:
+        raise RuntimeError("Aucune configuration n'a pu être mesurée")
+
+    model_name, rtf, compute_type, cpu_threads = best
+    memory_fraction = 0.6
+    if device == "cuda":
+        # Ce plafond ne s'applique qu'à l'allocateur torch (VAD Silero), pas à CTranslate2 :
+        # le VAD reçoit la VRAM restante après l'empreinte de Whisper (marge de 25%)
+        whisper_gb = 1.25 * MODEL_MEMORY_GB[model_tier(model_name)]
+        memory_fraction = round(min(0.6, max(0.05, (hw["vram_gb"] - whisper_gb) / hw["vram_gb"])), 2)
+
+    profile = {
+        # WHISPER_MODEL au moment du réglage : le profil est invalidé s'il change
+        "requested_model": WHISPER_MODEL,
+        "max_model": max_model,
+        "model": model_name,
+        "device": device,
+        "compute_type": compute_type,
+        "cpu_threads": cpu_threads,
+        "num_workers": 1,  # Un seul whisper_worker appelle transcribe
+        "memory_fraction": memory_fraction,
+        # Cœurs physiques laissés libres par CTranslate2, pour le VAD Silero (sans compter le SMT)
+        "torch_threads": max(1, hw["physical_cores"] - cpu_threads),
+        "rtf": round(rtf, 3),
+        "rtf_target": rtf_target,
+        "meets_target": rtf <= rtf_target,
+        "hardware": hw,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    return profile
+
+
+def save_profile(profile: dict, path: str = AUTOTUNE_PROFILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+
+
+def load_profile(path: str = AUTOTUNE_PROFILE, requested_model: str = WHISPER_MODEL) -> dict:
+    """Retourne le profil enregistré, ou None s'il est absent ou ne correspond plus à la configuration."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[Autotune] Profil illisible ({e}), valeurs par défaut utilisées")
+        return None
+
+    if profile.get("requested_model") != requested_model:
+        print("[Autotune] Profil obsolète (WHISPER_MODEL a changé), relancez python -m modules.autotune")
+        return None
+    if profile.get("device") == "cuda" and not torch.cuda.is_available():
+        print("[Autotune] Profil GPU mais CUDA indisponible, valeurs par défaut utilisées")
+        return None
+
+    # Profil copié depuis une autre machine (CACHE_DIR partagé) : ses réglages ne valent pas ici
+    saved, current = profile.get("hardware", {}), probe_hardware()
+    for key in ("logical_cores", "physical_cores", "cuda", "gpu_name"):
+        if saved.get(key) != current.get(key):
+            print(f"[Autotune] Profil réglé pour un autre matériel ({key}: {saved.get(key)} ≠ "
+                  f"{current.get(key)}), relancez python -m modules.autotune")
+            return None
+    return profile
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Choisit modèle, compute_type et threads pour cette machine")
+    parser.add_argument("--audio", required=True,
+                        help="Enregistrement de parole réelle, WAV mono int16 16 kHz, servant de référence")
+    parser.add_argument("--rtf-target", type=float, default=AUTOTUNE_RTF_TARGET)
+    parser.add_argument("--max-model", default=WHISPER_MODEL,
+                        help="Modèle faster-whisper le plus précis à essayer (tiny … large-v3, turbo)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", default=AUTOTUNE_PROFILE)
+    args = parser.parse_args()
+
+    if model_tier(args.max_model) is None:
+        parser.error(f"Modèle Whisper inconnu: {args.max_model}")
+    try:
+        load_sample(args.audio)
+    except (ValueError, OSError, wave.Error) as e:
+        parser.error(str(e))
+
+    profile = autotune(args.audio, args.rtf_target, args.max_model, args.runs)
+    save_profile(profile, args.output)
+    status = "✅" if profile["meets_target"] else "⚠️ objectif non atteint,"
+    print(f"{status} profil {profile['model']}/{profile['compute_type']}/{profile['cpu_threads']} threads "
+          f"(RTF={profile['rtf']:.2f}×) écrit dans {args.output}")
@@ -0,0 +1,191 @@
+import gzip
+import json
+import threading
+import time
+import uuid
+
+import requests
+from flask import request, make_response
+
+
+class TranscriptHistory:
+    """
+    Historique des segments traduits, indexé par numéro de séquence.
+
+    Chaque segment reçoit un numéro croissant (seq) ; l'epoch change à chaque réinitialisation
+    pour qu'un client ne reprenne jamais une séquence d'une session précédente.
+    Une réplique (nœud edge) démarre sans epoch tant qu'elle n'a rien reçu du nœud d'inférence.
+    """
+
+    def __init__(self, max_segments: int = 2000, replica: bool = False):
+        self.lock = threading.Lock()
+        self.max_segments = max_segments
+        self.segments = []
+        self.epoch = None if replica else uuid.uuid4().hex[:12]
+        self.last_seq = 0
+
+    def append(self, translations: dict, epoch: str = None) -> dict:
+        """
+        Ajoute un segment produit localement et retourne sa forme diffusable.
+
+        Si epoch est fourni et ne correspond plus (réinitialisation entre-temps), le segment
+        appartient à la session précédente : il est ignoré et None est retourné.
+        """
+        with self.lock:
+            if epoch is not None and epoch != self.epoch:
+                return None
+            self.last_seq += 1
+            segment = {'seq': self.last_seq, 'epoch': self.epoch,
+                       'ts': time.time(), 'translations': translations}
+            self._store(segment)
+        return segment
+
+    def insert(self, segment: dict):
+        """Ajoute un segment reçu d'un autre nœud (relais edge), en conservant son seq."""
+        with self.lock:
+            if segment['epoch'] != self.epoch:
+                self.segments, self.epoch = [], segment['epoch']
+            elif segment['seq'] <= self.last_seq:
+                return
+            elif self.segments and segment['seq'] != self.last_seq + 1:
+                # Trou dans le flux relayé : on repart de ce segment pour garder des seq contigus
+                self.segments = []
+            self.last_seq = segment['seq']
+            self._store(segment)
+
+    def seed(self, epoch: str, segments: list):
+        """Initialise une réplique avec l'historique du nœud d'inférence, sans écraser le direct."""
+        with self.lock:
+            if self.epoch not in (None, epoch):
+                # Réinitialisation reçue pendant l'amorçage : l'historique récupéré est périmé
+                return
+            live = self.segments
+            if live:
+                older = [s for s in segments if s['seq'] < live[0]['seq']]
+                if older and older[-1]['seq'] + 1 != live[0]['seq']:
+                    print("[Historique] Trou entre l'amorçage et le direct, amorçage ignoré")
+                    return
+                self.segments = older + live
+            else:
+                self.segments = list(segments)
+                self.last_seq = segments[-1]['seq'] if segments else 0
+            self.epoch = epoch
+            if len(self.segments) > self.max_segments:
+                del self.segments[:len(self.segments) - self.max_segments]
+
+    def seed_from(self, origin_url: str, page_size: int = 100):
+        """Pagine /history?lang=* du nœud d'inférence (toutes langues) pour amorcer la réplique."""
+        segments, after, epoch = [], 0, None
+        while True:
+            resp = requests.get(f"{origin_url}/history",
+                                params={'lang': '*', 'after': after, 'limit': page_size}, timeout=10)
+            resp.raise_for_status()
+            page = resp.json()
+            if epoch is not None and page['epoch'] != epoch:
+                # Réinitialisation pendant la pagination : on recommence
+                segments, after, epoch = [], 0, None
+                continue
+            epoch = page['epoch']
+            segments.extend(dict(s, epoch=epoch) for s in page['segments'])
+            if not page['has_more'] or not page['segments']:
+                break
+            after = page['segments'][-1]['seq']
+        self.seed(epoch, segments)
+        print(f"[Historique] Réplique amorcée: {len(segments)} segments (epoch {epoch})")
+
+    def reset(self, epoch: str = None) -> str:
+        with self.lock:
+            self.segments = []
+            self.epoch = epoch or uuid.uuid4().hex[:12]
+            self.last_seq = 0
+            return self.epoch
+
+    def _store(self, segment):
+        self.segments.append(segment)
+        if len(self.segments) > self.max_segments:
+            # Supprimer 20% des segments les plus anciens, comme les caches de traduction
+            del self.segments[:max(1, int(self.max_segments * 0.2))]
+
+    def since(self, after_seq: int, language: str, limit: int) -> dict:
+        """
+        Segments de seq > after_seq dans une seule langue (ou toutes si language vaut '*'),
+        au plus limit. L'ETag est calculé sous le même verrou que la page.
+        """
+        with self.lock:
+            first_seq = self.segments[0]['seq'] if self.segments else self.last_seq + 1
+            # Les seq d'un même epoch sont contigus : accès direct par index
+            start = max(0, after_seq + 1 - first_seq)
+            page = self.segments[start:start + limit]
+            if language == '*':
+                items = [{'seq': s['seq'], 'ts': s['ts'], 'translations': s['translations']} for s in page]
+            else:
+                items = [{'seq': s['seq'], 'ts': s['ts'],
+                          'text': s['translations'].get(language, '')} for s in page]
+            return {
+                'epoch': self.epoch,
+                # Le client écarte une réponse arrivée après un changement de langue
+                'language': language,
+                'last_seq': self.last_seq,
+                # Segments demandés déjà évincés (ou antérieurs à l'amorçage d'une réplique)
+                'truncated': after_seq + 1 < first_seq,
+                'has_more': start + limit < len(self.segments),
+                'segments': items,
+                'etag': f"{self.epoch}-{self.last_seq}-{language}-{after_seq}-{limit}",
+            }
+
+
+def register_history_api(app, socketio, history: TranscriptHistory, default_language: str,
+                         page_size: int = 100):
+    """
+    Expose l'historique aux spectateurs :
+      - GET /history?lang=en&after=0&limit=100 : page JSON compressée (gzip) avec ETag faible,
+        lang=* pour toutes les langues (amorçage des nœuds edge),
+      - Socket.IO 'resume' {epoch, last_seq, language} : renvoie uniquement les segments manqués.
+    """
+
+    @app.route('/history')
+    def history_page():
+        language = request.args.get('lang', default_language)
+        after = request.args.get('after', 0, type=int)
+        limit = max(1, min(request.args.get('limit', page_size, type=int), page_size))
+
+        payload = history.since(after, language, limit)
+        # ETag faible : la même page sert en gzip ou en clair ; un 304 évite sérialisation et compression
+        etag = payload.pop('etag')
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            if 'gzip' in request.headers.get('Accept-Encoding', '') and len(body) > 512:
+                body = gzip.compress(body, compresslevel=6)
+                response = make_response(body)
+                response.headers['Content-Encoding'] = 'gzip'
+            else:
+                response = make_response(body)
+            response.mimetype = 'application/json'
+        response.set_etag(etag, weak=True)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    @socketio.on('resume')
+    def handle_resume(data):
+        data = data if isinstance(data, dict) else {}
+        language = str(data.get('language', default_language))
+        if history.epoch is None:
+            # Réplique pas encore amorcée : le client garde son historique et réessaie
+            socketio.emit('history_segments', {'unknown': True, 'language': language},
+                          to=request.sid, ignore_queue=True)
+            return
+        try:
+            after = max(0, int(data.get('last_seq', 0)))
+        except (TypeError, ValueError):
+            after = 0
+        if data.get('epoch') != history.epoch:
+            after = 0
+        payload = history.since(after, language, page_size)
+        del payload['etag']
+        # Epoch différent : session réinitialisée depuis, le client repart de zéro
+        payload['reset'] = data.get('epoch') != history.epoch
+        socketio.emit('history_segments', payload, to=request.sid, ignore_queue=True)
+
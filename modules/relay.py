@@ -0,0 +1,80 @@
+import threading
+
+import socketio
+
+
+# Canal par défaut de Flask-SocketIO : le nœud d'inférence publie dessus
+DEFAULT_CHANNEL = "flask-socketio"
+
+
+class RelayState:
+    """Dernier état diffusé par le nœud d'inférence, rejoué aux spectateurs qui se connectent."""
+
+    def __init__(self, history=None):
+        self.lock = threading.Lock()
+        # Réplique locale de l'historique (modules.history.TranscriptHistory), alimentée par les diffusions
+        self.history = history
+        self.transcription = {'text': ''}
+        self.recording_status = {'status': False}
+
+    def on_broadcast(self, event, data):
+        with self.lock:
+            if event == 'update_transcription':
+                self.transcription = data
+            elif event == 'recording_status':
+                self.recording_status = data
+            elif event == 'heartbeat':
+                # Émis seulement pendant l'enregistrement : rattrape un edge démarré en cours de session
+                self.recording_status = {'status': True}
+            elif self.history is not None and event == 'new_segment':
+                self.history.insert(data)
+            elif self.history is not None and event == 'history_reset':
+                self.history.reset(data['epoch'])
+
+    def snapshot(self):
+        with self.lock:
+            return self.transcription, self.recording_status
+
+
+class _BroadcastTapMixin:
+    """
+    Intercepte les diffusions reçues du broker avant de les relayer aux clients locaux.
+
+    Attention : surcharge PubSubManager._handle_emit, API privée de python-socketio, et lit
+    les clés internes du message (event, data, namespace, room). Vérifié pour python-socketio
+    5.x, d'où l'intervalle de versions épinglé dans requirements.txt.
+    """
+
+    on_broadcast = None
+
+    def _handle_emit(self, message):
+        # Seules les diffusions globales décrivent l'état commun ; les emits ciblés sont ignorés
+        if message.get('room') is None and message.get('namespace') in (None, '/'):
+            try:
+                self.on_broadcast(message['event'], message['data'])
+            except Exception as e:
+                print(f"Erreur dans le relais d'état: {e}")
+        super()._handle_emit(message)
+
+
+def create_client_manager(url: str, on_broadcast, channel: str = DEFAULT_CHANNEL):
+    """
+    Construit le client_manager d'un nœud edge, abonné au même broker que le nœud d'inférence.
+
+    :param url: URL du broker (redis://, rediss:// ou toute URL Kombu)
+    :param on_broadcast: Fonction appelée avec (event, data) pour chaque diffusion reçue
+    :param channel: Canal pub/sub (doit correspondre à celui du nœud d'inférence)
+    """
+    if not url:
+        raise ValueError("MESSAGE_QUEUE doit être défini pour un nœud edge")
+
+    # Même choix de classe que Flask-SocketIO pour message_queue
+    if url.startswith(('redis://', 'rediss://')):
+        base = socketio.RedisManager
+    else:
+        base = socketio.KombuManager
+
+    manager_class = type(f"Relay{base.__name__}", (_BroadcastTapMixin, base), {})
+    manager = manager_class(url, channel=channel)
+    manager.on_broadcast = on_broadcast
+    return manager
@@ -8,11 +8,49 @@ import gc
 import os
 
 
+# Paramètres de décodage optimisés pour la GTX 1660 Ti (partagés avec modules/autotune.py)
+DECODE_OPTIONS = dict(
+    vad_filter=False,  # Le VAD est déjà appliqué en amont
+    beam_size=3,  # Réduit pour performance sans trop sacrifier la qualité
+    best_of=1,
+    temperature=0,
+    compression_ratio_threshold=2.0,  # Plus tolérant pour les segments courts
+    log_prob_threshold=-1.5,  # Légèrement plus restrictif
+    no_speech_threshold=0.35  # Plus sensible
+)
+
+# Gammes de modèles Whisper, du plus léger au plus précis
+MODEL_TIERS = ("tiny", "base", "small", "medium", "large")
+
+
+def model_tier(name: str) -> str:
+    """
+    Gamme d'un nom de modèle faster-whisper : « small.en » -> small, « large-v3 », « turbo »
+    ou « distil-large-v3 » -> large. None pour un nom inconnu (chemin local, dépôt personnalisé).
+    """
+    base = name.removeprefix("distil-").split(".")[0]
+    if base.startswith("large") or base.endswith("turbo"):
+        return "large"
+    return base if base in MODEL_TIERS else None
+
+
+def build_prompt(full_transcript: str):
+    """Prompt contextuel : les derniers mots transcrits, pour améliorer la continuité."""
+    if not full_transcript:
+        return None
+    return f"Transcription précédente: \"{full_transcript[-200:]}\". Suite:"
+
+
 class WhisperTranscriber:
     def __init__(self,
                  model_name: str = "small",
                  device: str = None,
-                 language: str = "fr"):
+                 language: str = "fr",
+                 compute_type: str = None,
+                 cpu_threads: int = 6,
+                 num_workers: int = 1,
+                 memory_fraction: float = 0.6):
+        """Les valeurs par défaut conviennent au Ryzen 5 4600H / GTX 1660 Ti ; voir modules/autotune.py."""
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         print(f"[Init] Chargement de Whisper « {model_name} » sur {self.device}…")
 
@@ -28,10 +66,10 @@ class WhisperTranscriber:
         self.model = WhisperModel(
             model_name,
             device=self.device,
-            compute_type="int8_float16" if self.device == "cuda" else "int8",
+            compute_type=compute_type or ("int8_float16" if self.device == "cuda" else "int8"),
             download_root="models_cache",  # Cache local
-            cpu_threads=6,  # Optimisé pour Ryzen 5 4600H
-            num_workers=1  # Nombre de workers pour le chargement
+            cpu_threads=cpu_threads,  # 6 par défaut : optimisé pour Ryzen 5 4600H
+            num_workers=num_workers  # Nombre de workers pour le chargement
         )
 
         self.language = language
@@ -41,9 +79,10 @@ class WhisperTranscriber:
         self.segment_cache = {}
         self.cache_size = 100  # Limite du cache
 
-        if self.device == "cuda" and model_name in ["medium", "large"]:
-            torch.cuda.set_per_process_memory_fraction(0.6)
-            print(f"[CUDA] Limitation mémoire à 60% de la VRAM disponible pour modèle {model_name}")
+        # Plafonne l'allocateur torch (VAD Silero) pour laisser la VRAM au modèle Whisper
+        if self.device == "cuda" and model_tier(model_name) in ("medium", "large"):
+            torch.cuda.set_per_process_memory_fraction(memory_fraction)
+            print(f"[CUDA] Limitation mémoire torch à {memory_fraction:.0%} de la VRAM pour modèle {model_name}")
 
     def transcribe_audio(self, audio_data, sample_rate: int) -> str:
         """Retourne le texte transcrit pour un segment audio avec améliorations de continuité."""
@@ -75,23 +114,13 @@ class WhisperTranscriber:
             return transcript
 
         # Préparation du prompt contextuel pour améliorer la continuité
-        prompt = None
-        if self.full_transcript:
-            # Utiliser les derniers mots comme contexte
-            prompt = f"Transcription précédente: \"{self.full_transcript[-200:]}\". Suite:"
+        prompt = build_prompt(self.full_transcript)
 
-        # Paramètres optimisés pour la GTX 1660 Ti
         segments, _ = self.model.transcribe(
             audio_data,
             language=self.language,
             initial_prompt=prompt,
-            vad_filter=False,  # Le VAD est déjà appliqué en amont
-            beam_size=3,  # Réduit pour performance sans trop sacrifier la qualité
-            best_of=1,
-            temperature=0,
-            compression_ratio_threshold=2.0,  # Plus tolérant pour les segments courts
-            log_prob_threshold=-1.5,  # Légèrement plus restrictif
-            no_speech_threshold=0.35  # Plus sensible
+            **DECODE_OPTIONS
         )
 
         # Concatène tous les segments
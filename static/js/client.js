@@ -22,9 +22,76 @@ document.addEventListener('DOMContentLoaded', function() {
         'it': 'Italiano'
     };
 
+    // Historique des segments traduits dans la langue courante
+    let epoch = null;
+    let lastSeq = 0;
+    let segments = [];
+    // Vrai du 'resume' jusqu'à la dernière page HTTP : une seule reprise à la fois
+    let resuming = false;
+    // Incrémenté à chaque reprise : une chaîne de pages HTTP plus ancienne s'arrête d'elle-même
+    let resumeId = 0;
+
+    function renderTranslation() {
+        if (segments.length) {
+            translationElement.textContent = segments.map(s => s.text).join(' ');
+            translationElement.scrollTop = translationElement.scrollHeight;
+        } else {
+            translationElement.textContent = 'Aucune traduction disponible';
+        }
+    }
+
+    function addSegments(newSegments, truncated) {
+        if (truncated) {
+            // Segments évincés de l'historique du serveur : trou signalé plutôt que texte recollé
+            segments.push({ seq: lastSeq, text: '[…]' });
+        }
+        newSegments.forEach(function(segment) {
+            if (segment.seq > lastSeq) {
+                segments.push(segment);
+                lastSeq = segment.seq;
+            }
+        });
+        renderTranslation();
+    }
+
+    // Ne demande que les segments manqués depuis lastSeq
+    function resume() {
+        resuming = true;
+        resumeId++;
+        socket.emit('resume', { epoch: epoch, last_seq: lastSeq, language: currentLanguage });
+    }
+
+    // Rattrapage volumineux : pages HTTP compressées (gzip) et revalidées par ETag
+    function fetchHistory(id) {
+        fetch(`/history?lang=${currentLanguage}&after=${lastSeq}`)
+            .then(response => response.json())
+            .then(function(data) {
+                if (id !== resumeId || data.language !== currentLanguage) {
+                    // Réponse d'une reprise abandonnée (langue changée, reconnexion)
+                    return;
+                }
+                if (data.epoch !== epoch) {
+                    return resume();
+                }
+                addSegments(data.segments, data.truncated);
+                if (data.has_more) {
+                    fetchHistory(id);
+                } else {
+                    resuming = false;
+                }
+            })
+            .catch(function(error) {
+                console.error("Erreur de récupération de l'historique:", error);
+                if (id === resumeId) {
+                    resuming = false;
+                }
+            });
+    }
+
     // Connection debugging
     socket.on('connect', function() {
         console.log('Connecté au serveur avec ID:', socket.id);
+        resume();
     });
 
     socket.on('disconnect', function() {
@@ -32,15 +99,54 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 
     // Socket.io event handlers
-    socket.on('update_translations', function(translations) {
-        console.log("Reçu translations:", translations);
-        if (translations && translations[currentLanguage]) {
-            translationElement.textContent = translations[currentLanguage];
+    socket.on('history_segments', function(data) {
+        console.log("Reçu historique:", data);
+        if (data.language !== currentLanguage) {
+            // Réponse demandée avant un changement de langue
+            return;
+        }
+        if (data.unknown) {
+            // Nœud edge pas encore amorcé : on garde l'historique local et on réessaie
+            const id = resumeId;
+            setTimeout(function() {
+                if (id === resumeId) {
+                    resume();
+                }
+            }, 2000);
+            return;
+        }
+        if (data.reset || data.epoch !== epoch) {
+            segments = [];
+            lastSeq = 0;
+            epoch = data.epoch;
+        }
+        addSegments(data.segments, data.truncated);
+        if (data.has_more) {
+            fetchHistory(resumeId);
         } else {
-            translationElement.textContent = 'Aucune traduction disponible';
+            resuming = false;
         }
     });
 
+    socket.on('new_segment', function(segment) {
+        if (resuming) {
+            // Sera couvert par la reprise en cours
+            return;
+        }
+        if (segment.epoch !== epoch || segment.seq > lastSeq + 1) {
+            // Segments manqués (ou nouvelle session) : reprise depuis le dernier reçu
+            return resume();
+        }
+        addSegments([{ seq: segment.seq, ts: segment.ts, text: segment.translations[currentLanguage] || '' }]);
+    });
+
+    socket.on('history_reset', function(data) {
+        epoch = data.epoch;
+        segments = [];
+        lastSeq = 0;
+        renderTranslation();
+    });
+
     socket.on('update_transcription', function(data) {
         console.log("Reçu transcription:", data);
     });
@@ -62,7 +168,10 @@ document.addEventListener('DOMContentLoaded', function() {
         currentLanguage = this.value;
         languageTitle.textContent = languageNames[currentLanguage] || currentLanguage;
 
-        // Re-request the current translation
-        socket.emit('get_translation', { language: currentLanguage });
+        // Recharger l'historique dans la nouvelle langue
+        segments = [];
+        lastSeq = 0;
+        renderTranslation();
+        resume();
     });
 });
\ No newline at end of file
@@ -0,0 +1,240 @@
+# tools/load_test.py
+"""
+Test de charge Socket.IO : simule N spectateurs /client contre un serveur local.
+
+Le serveur doit être lancé avec LOAD_TEST_MODE=1 pour exposer /load_test/*.
+Chaque client reproduit static/js/client.js : handshake 'resume' à la connexion, pages
+/history si le rattrapage est long, puis réception des new_segment.
+Pour chaque palier de N clients, on mesure :
+  - le temps de la « tempête » de connexions (tous les clients connectés et rattrapés),
+  - la latence de livraison des new_segment par client (réception - horodatage serveur),
+  - le CPU et la mémoire du processus serveur,
+  - les segments perdus (numéros de séquence manquants par client).
+
+Exemple :
+    LOAD_TEST_MODE=1 python app.py
+    python tools/load_test.py --clients 50,100,200,400 --messages 30
+    python tools/load_test.py --clients 100 --wav conference.wav
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+
+import aiohttp
+import psutil
+import requests
+import socketio
+
+
+class AudienceClient:
+    """Un spectateur, connecté avec les mêmes options que static/js/client.js."""
+
+    def __init__(self, url, language, http):
+        self.url = url
+        self.language = language
+        self.http = http
+        # AsyncClient : tous les spectateurs partagent une seule boucle asyncio,
+        # sans coût de threads ni de GIL par client dans les mesures
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.ready = asyncio.Event()
+        self.epoch = None
+        self.last_seq = 0
+        self.received = {}  # seq -> latence (s)
+        self.sio.on('connect', self._on_connect)
+        self.sio.on('history_segments', self._on_history)
+        self.sio.on('new_segment', self._on_segment)
+
+    async def _on_connect(self):
+        await self.sio.emit('resume', {'epoch': self.epoch, 'last_seq': self.last_seq,
+                                       'language': self.language})
+
+    async def _on_history(self, data):
+        if data.get('unknown'):
+            # Nœud edge pas encore amorcé : même nouvel essai que client.js
+            await asyncio.sleep(2)
+            await self._on_connect()
+            return
+        self.epoch = data['epoch']
+        self._add(data['segments'])
+        # Rattrapage long : pages HTTP gzip, comme fetchHistory() dans client.js
+        while data['has_more']:
+            async with self.http.get(f"{self.url}/history",
+                                     params={'lang': self.language, 'after': self.last_seq}) as resp:
+                data = await resp.json()
+            self._add(data['segments'])
+        self.ready.set()
+
+    async def _on_segment(self, segment):
+        now = time.time()
+        self.received.setdefault(segment['seq'], now - segment['ts'])
+        self.last_seq = max(self.last_seq, segment['seq'])
+
+    def _add(self, segments):
+        if segments:
+            self.last_seq = max(self.last_seq, segments[-1]['seq'])
+
+    async def connect(self, timeout):
+        try:
+            await self.sio.connect(self.url, transports=['websocket'], wait_timeout=timeout)
+            await asyncio.wait_for(self.ready.wait(), timeout)
+            return True
+        except Exception as e:
+            print(f"Erreur de connexion: {e}")
+            return False
+
+    async def disconnect(self):
+        try:
+            await self.sio.disconnect()
+        except Exception:
+            pass
+
+
+class ServerSampler(threading.Thread):
+    """Échantillonne CPU et mémoire (RSS) du processus serveur."""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.cpu = []
+        self.rss = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        self.process.cpu_percent(None)
+        while not self._stop_event.wait(self.interval):
+            self.cpu.append(self.process.cpu_percent(None))
+            self.rss.append(self.process.memory_info().rss)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def feed_text(url, messages, rate, translate):
+    """Injecte des phrases synthétiques à cadence fixe."""
+    for i in range(messages):
+        requests.post(f"{url}/load_test/inject",
+                      json={'text': f"Phrase de test numéro {i}.", 'translate': translate},
+                      timeout=10)
+        time.sleep(1.0 / rate)
+
+
+def feed_wav(url, wav_name):
+    """Fait rejouer un enregistrement de RECORDINGS_DIR par le serveur et attend sa durée."""
+    resp = requests.post(f"{url}/load_test/inject", json={'wav': wav_name}, timeout=10)
+    resp.raise_for_status()
+    time.sleep(resp.json()['duration'])
+
+
+async def run_step(args, n_clients, pid):
+    http = aiohttp.ClientSession()
+    clients = [AudienceClient(args.url, args.language, http) for _ in range(n_clients)]
+    sampler = ServerSampler(pid)
+    sampler.start()
+
+    # Tempête de connexions : toutes les connexions lancées en même temps sur la boucle
+    start = time.time()
+    results = await asyncio.gather(*(c.connect(args.timeout) for c in clients))
+    connect_time = time.time() - start
+    connected = [c for c, ok in zip(clients, results) if ok]
+
+    # Les appels HTTP bloquants tournent hors de la boucle pour ne pas retarder les réceptions
+    def stats():
+        return requests.get(f"{args.url}/load_test/stats", timeout=10).json()['segment_seq']
+
+    seq_before = await asyncio.to_thread(stats)
+    if args.wav:
+        await asyncio.to_thread(feed_wav, args.url, args.wav)
+    else:
+        await asyncio.to_thread(feed_text, args.url, args.messages, args.rate, args.translate)
+    # Borne lue dès la fin de l'injection : les segments encore en vol ont le temps d'arriver
+    seq_after = await asyncio.to_thread(stats)
+    await asyncio.sleep(args.drain)
+
+    sampler.stop()
+    await asyncio.gather(*(c.disconnect() for c in clients))
+    await http.close()
+
+    expected = set(range(seq_before + 1, seq_after + 1))
+    latencies, lost = [], 0
+    for c in connected:
+        latencies.extend(lat for seq, lat in c.received.items() if seq in expected)
+        lost += len(expected - set(c.received))
+    total = len(expected) * len(connected)
+
+    return {
+        'clients': n_clients,
+        'connected': len(connected),
+        'connect_storm_s': round(connect_time, 3),
+        'messages': len(expected),
+        'latency_p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'latency_p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'latency_max_ms': round(max(latencies, default=0) * 1000, 1),
+        'loss_pct': round(100 * lost / total, 2) if total else 0.0,
+        'cpu_mean_pct': round(statistics.mean(sampler.cpu), 1) if sampler.cpu else 0.0,
+        'cpu_max_pct': round(max(sampler.cpu, default=0), 1),
+        'rss_max_mb': round(max(sampler.rss, default=0) / 1e6, 1),
+    }
+
+
+def positive_float(value):
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"doit être strictement positif: {value}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge des spectateurs /client")
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--clients', default='50,100,200',
+                        help="Paliers de clients, séparés par des virgules")
+    parser.add_argument('--messages', type=int, default=20,
+                        help="Nombre de phrases synthétiques par palier")
+    parser.add_argument('--rate', type=positive_float, default=2.0,
+                        help="Phrases injectées par seconde")
+    parser.add_argument('--language', default='fr',
+                        help="Langue des spectateurs simulés (fr = texte injecté non traduit)")
+    parser.add_argument('--translate', action='store_true',
+                        help="Traduire aussi les phrases injectées (appels AWS réels)")
+    parser.add_argument('--wav', help="Nom d'un WAV mono 16 kHz int16 de RECORDINGS_DIR (côté serveur) "
+                                      "à la place du texte")
+    parser.add_argument('--drain', type=float, default=3.0,
+                        help="Attente après injection pour les messages en vol (s)")
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--output', help="Fichier JSON pour les résultats")
+    args = parser.parse_args()
+
+    pid = requests.get(f"{args.url}/load_test/stats", timeout=10).json()['pid']
+    results = []
+    for n in (int(x) for x in args.clients.split(',')):
+        print(f"[Charge] Palier de {n} clients…")
+        result = asyncio.run(run_step(args, n, pid))
+        print(f"[Charge] {result}")
+        results.append(result)
+
+    print("\nclients  connectés  connexion(s)  p50(ms)  p95(ms)  max(ms)  pertes(%)  CPU moy/max(%)  RSS(Mo)")
+    for r in results:
+        print(f"{r['clients']:>7}  {r['connected']:>9}  {r['connect_storm_s']:>12}  "
+              f"{r['latency_p50_ms']:>7}  {r['latency_p95_ms']:>7}  {r['latency_max_ms']:>7}  "
+              f"{r['loss_pct']:>9}  {r['cpu_mean_pct']:>6}/{r['cpu_max_pct']:<6}  {r['rss_max_mb']:>7}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()